@@ -1,19 +1,28 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, status, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_validator
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, TypeAdapter, field_validator
+from typing import List, Optional, Literal, Tuple
 import uuid
+import hashlib
+import orjson
 from datetime import datetime, timezone, timedelta
+from dateutil.relativedelta import relativedelta
 from passlib.context import CryptContext
 import jwt
 from functools import wraps
-import io
+from collections import OrderedDict
+from types import MappingProxyType
+from dataclasses import dataclass, asdict
+from cachetools import TTLCache
 import csv
 from zoneinfo import ZoneInfo
 
@@ -22,7 +31,7 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # JWT Config
@@ -30,15 +39,52 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'fingestao-super-secret-key-2024')
 JWT_ALGORITHM = 'HS256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 7
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Refresh tokens are stored as a keyed BLAKE2b digest rather than the raw JWT
+REFRESH_TOKEN_HASH_KEY = hashlib.blake2b(JWT_SECRET.encode(), digest_size=32).digest()
+# Only exp/sub/type are used, so skip verification of claims we never issue
+JWT_DECODE_OPTIONS = {
+    "verify_aud": False,
+    "verify_iss": False,
+    "verify_nbf": False,
+    "verify_iat": False,
+    "require": ["exp", "sub", "type"],
+}
+
+# Password hashing (cost factor is tunable per deployment hardware)
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Timezone
 BRAZIL_TZ = ZoneInfo("America/Bahia")
 
-# Rate limiting storage (in production, use Redis)
-login_attempts = {}
+# Case-insensitive collation for category names (must match the index collation)
+CATEGORY_NAME_COLLATION = {"locale": "pt", "strength": 2}
+
+# Timestamp fields that older deployments stored as ISO strings
+ISO_DATE_FIELDS = {
+    "users": ("created_at", "updated_at"),
+    "categories": ("created_at",),
+    "transactions": ("date", "created_at", "updated_at", "deleted_at"),
+    "refresh_tokens": ("created_at", "expires_at"),
+}
+
+# Goal timestamps, converted by a later migration
+GOAL_ISO_DATE_FIELDS = {
+    "goals": ("created_at", "deadline"),
+}
+
+# Short-lived cache of authenticated user documents, keyed by user_id
+user_cache = TTLCache(maxsize=10_000, ttl=30)
+
+# Category documents keyed by (user_id, category_id); invalidated on update/delete
+category_cache = TTLCache(maxsize=10_000, ttl=60)
+
+# Rate limiting storage (per process; in production, use Redis).
+# Ordered by last failed attempt so expired and oldest entries sit at the front.
+LOGIN_ATTEMPTS_LIMIT = 5
+LOGIN_ATTEMPTS_WINDOW = timedelta(minutes=15)
+LOGIN_ATTEMPTS_MAX_ENTRIES = 10_000
+login_attempts = OrderedDict()
 
 # Configure logging
 logging.basicConfig(
@@ -47,8 +93,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def utc_datetime(obj):
+    """Datetimes as UTC with a Z suffix, the format pydantic emits for stored values."""
+    if isinstance(obj, datetime):
+        aware = obj if obj.tzinfo else obj.replace(tzinfo=timezone.utc)
+        return aware.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+    raise TypeError
+
+class AppJSONResponse(ORJSONResponse):
+    """The app's orjson response; every handler-built dict is serialized here.
+    
+    Datetimes are normalized to UTC so echoed local inputs and values read
+    back from Mongo come out in the same format as the pydantic routes.
+    
+    Handlers that return it directly skip FastAPI's jsonable_encoder and
+    response_model validation; response_model stays on the route for the docs.
+    """
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=utc_datetime, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
 # Create the main app
-app = FastAPI(title="FinGestão API", version="1.0.0")
+app = FastAPI(title="FinGestão API", version="1.0.0", default_response_class=AppJSONResponse)
 
 # Create routers
 api_router = APIRouter(prefix="/api")
@@ -71,11 +136,19 @@ class UserCreate(UserBase):
     @field_validator('password')
     @classmethod
     def validate_password(cls, v):
-        if not any(c.isupper() for c in v):
+        has_upper = has_lower = has_digit = False
+        for c in v:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+        if not has_upper:
             raise ValueError('Senha deve conter pelo menos 1 letra maiúscula')
-        if not any(c.islower() for c in v):
+        if not has_lower:
             raise ValueError('Senha deve conter pelo menos 1 letra minúscula')
-        if not any(c.isdigit() for c in v):
+        if not has_digit:
             raise ValueError('Senha deve conter pelo menos 1 número')
         return v
     
@@ -233,26 +306,135 @@ class UserSettingsUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=2, max_length=100)
     theme: Optional[Literal["dark", "light"]] = None
 
+# List responses are serialized straight to JSON bytes by pydantic-core
+CATEGORY_LIST_ADAPTER = TypeAdapter(List[CategoryResponse])
+
+@dataclass(slots=True)
+class TxRow:
+    """Stored transaction document; also reused as the response body."""
+    id: str
+    user_id: str
+    type: str
+    description: str
+    amount_cents: int
+    date: datetime
+    category_id: str
+    payment_method: Optional[str]
+    notes: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    deleted_at: Optional[datetime] = None
+
+# ==================== PROJECTIONS ====================
+
+# Only the fields the list endpoints actually serialize
+TRANSACTION_FIELDS = {
+    "_id": 0, "id": 1, "user_id": 1, "type": 1, "description": 1, "date": 1,
+    "category_id": 1, "payment_method": 1, "notes": 1, "created_at": 1, "updated_at": 1
+}
+TRANSACTION_PROJECTION = {**TRANSACTION_FIELDS, "amount_cents": 1}
+
+# Amounts are stored as integer cents; aggregations hand back reais
+AMOUNT_EXPR = {"$divide": ["$amount_cents", 100]}
+CATEGORY_PROJECTION = {"_id": 0, "id": 1, "user_id": 1, "name": 1, "type": 1, "color": 1, "icon": 1, "created_at": 1}
+
+# Aggregation stages that join a transaction with its category name/color
+CATEGORY_LOOKUP_STAGES = [
+    {"$lookup": {"from": "categories", "localField": "category_id", "foreignField": "id", "as": "cat"}},
+    {"$addFields": {
+        "category_name": {"$arrayElemAt": ["$cat.name", 0]},
+        "category_color": {"$arrayElemAt": ["$cat.color", 0]}
+    }},
+    {"$project": {**TRANSACTION_FIELDS, "amount": AMOUNT_EXPR, "category_name": 1, "category_color": 1}},
+]
+
+# Rows per cursor batch while streaming the CSV export
+EXPORT_BATCH_SIZE = 1000
+
+# CSV export columns only, with the category name joined in
+EXPORT_PROJECTION = {"_id": 0, "type": 1, "description": 1, "amount_cents": 1, "date": 1, "payment_method": 1, "notes": 1}
+EXPORT_LOOKUP_STAGES = [
+    {"$lookup": {"from": "categories", "localField": "category_id", "foreignField": "id", "as": "cat"}},
+    {"$project": {**EXPORT_PROJECTION, "category_name": {"$arrayElemAt": ["$cat.name", 0]}}},
+]
+
+# ==================== AMOUNT HELPERS ====================
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+# ==================== DATE HELPERS ====================
+
+def to_aware(dt: datetime) -> datetime:
+    """Naive datetimes are interpreted as America/Bahia local time."""
+    return dt if dt.tzinfo else dt.replace(tzinfo=BRAZIL_TZ)
+
+def parse_date_param(value: str, end_of_day: bool = False) -> datetime:
+    """Parse a YYYY-MM-DD or ISO 8601 query parameter into an aware datetime."""
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida")
+    if end_of_day and len(value) == 10:
+        dt = dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return to_aware(dt)
+
+def month_bounds(year: int, month: int, tz: ZoneInfo = BRAZIL_TZ) -> Tuple[datetime, datetime]:
+    """First instant of the month and of the next one, for half-open $gte/$lt ranges."""
+    start = datetime(year, month, 1, tzinfo=tz)
+    return start, start + relativedelta(months=1)
+
+def local_date_str(dt: datetime) -> str:
+    return dt.astimezone(BRAZIL_TZ).strftime("%Y-%m-%d")
+
 # ==================== AUTH HELPERS ====================
 
-def create_access_token(user_id: str) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+def hash_refresh_token(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16, key=REFRESH_TOKEN_HASH_KEY).digest()
+
+# bcrypt is CPU-bound, so it runs in the default executor instead of blocking the event loop
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(None, pwd_context.hash, password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(None, pwd_context.verify, password, hashed)
+
+def create_access_token(user_id: str, now: Optional[datetime] = None) -> str:
+    expire = (now or datetime.now(timezone.utc)) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": user_id, "exp": expire, "type": "access"}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def create_refresh_token(user_id: str) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+def create_refresh_token(user_id: str, now: Optional[datetime] = None) -> str:
+    expire = (now or datetime.now(timezone.utc)) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     payload = {"sub": user_id, "exp": expire, "type": "refresh", "jti": str(uuid.uuid4())}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(request: Request) -> dict:
+def refresh_token_doc(user_id: str, token: str, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "token_hash": hash_refresh_token(token),
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    }
+
+async def get_current_user_id(request: Request) -> str:
+    """Authenticate the request from the access token alone, without a DB lookup."""
+    # Already decoded earlier in this request
+    cached_user_id = getattr(request.state, "user_id", None)
+    if cached_user_id is not None:
+        return cached_user_id
+    
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Token não fornecido")
     
     token = auth_header.split(" ")[1]
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options=JWT_DECODE_OPTIONS)
         if payload.get("type") != "access":
             raise HTTPException(status_code=401, detail="Token inválido")
         user_id = payload.get("sub")
@@ -261,62 +443,88 @@ async def get_current_user(request: Request) -> dict:
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token inválido")
     
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
-    if not user:
-        raise HTTPException(status_code=401, detail="Usuário não encontrado")
+    request.state.jwt_payload = payload
+    request.state.user_id = user_id
+    return user_id
+
+async def get_current_user(user_id: str = Depends(get_current_user_id)) -> dict:
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if not user:
+            raise HTTPException(status_code=401, detail="Usuário não encontrado")
+        user_cache[user_id] = user
     
     return user
 
+async def get_user_category(user_id: str, category_id: str) -> Optional[dict]:
+    key = (user_id, category_id)
+    category = category_cache.get(key)
+    if category is None:
+        category = await db.categories.find_one({"id": category_id, "user_id": user_id}, CATEGORY_PROJECTION)
+        if category:
+            category_cache[key] = category
+    
+    return category
+
 def check_rate_limit(email: str) -> bool:
     now = datetime.now(timezone.utc)
-    if email in login_attempts:
-        attempts, last_attempt = login_attempts[email]
-        if now - last_attempt < timedelta(minutes=15):
-            if attempts >= 5:
-                return False
+    entry = login_attempts.get(email)
+    if entry:
+        attempts, last_attempt = entry
+        if now - last_attempt < LOGIN_ATTEMPTS_WINDOW:
+            return attempts < LOGIN_ATTEMPTS_LIMIT
+        login_attempts.pop(email, None)
     return True
 
 def record_login_attempt(email: str, success: bool):
     now = datetime.now(timezone.utc)
     if success:
         login_attempts.pop(email, None)
+        return
+    
+    entry = login_attempts.pop(email, None)
+    if entry and now - entry[1] < LOGIN_ATTEMPTS_WINDOW:
+        login_attempts[email] = (entry[0] + 1, now)
     else:
-        if email in login_attempts:
-            attempts, _ = login_attempts[email]
-            login_attempts[email] = (attempts + 1, now)
-        else:
-            login_attempts[email] = (1, now)
-
-# Default categories for new users
-DEFAULT_CATEGORIES = [
-    {"name": "Alimentação", "type": "EXPENSE", "color": "#ef4444", "icon": "utensils"},
-    {"name": "Transporte", "type": "EXPENSE", "color": "#f59e0b", "icon": "car"},
-    {"name": "Moradia", "type": "EXPENSE", "color": "#8b5cf6", "icon": "home"},
-    {"name": "Saúde", "type": "EXPENSE", "color": "#ec4899", "icon": "heart-pulse"},
-    {"name": "Educação", "type": "EXPENSE", "color": "#3b82f6", "icon": "graduation-cap"},
-    {"name": "Lazer", "type": "EXPENSE", "color": "#14b8a6", "icon": "gamepad-2"},
-    {"name": "Assinaturas", "type": "EXPENSE", "color": "#6366f1", "icon": "tv"},
-    {"name": "Investimentos", "type": "BOTH", "color": "#10b981", "icon": "trending-up"},
-    {"name": "Salário", "type": "INCOME", "color": "#22c55e", "icon": "wallet"},
-    {"name": "Freelance", "type": "INCOME", "color": "#06b6d4", "icon": "laptop"},
-    {"name": "Outros", "type": "BOTH", "color": "#71717a", "icon": "more-horizontal"},
-]
+        login_attempts[email] = (1, now)
+    
+    while len(login_attempts) > LOGIN_ATTEMPTS_MAX_ENTRIES:
+        login_attempts.popitem(last=False)
+
+async def sweep_login_attempts(interval_seconds: int = 60):
+    """Periodically drop entries whose rate-limit window has expired."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        cutoff = datetime.now(timezone.utc) - LOGIN_ATTEMPTS_WINDOW
+        while login_attempts:
+            _, (_, last_attempt) = next(iter(login_attempts.items()))
+            if last_attempt >= cutoff:
+                break
+            login_attempts.popitem(last=False)
+
+# Default categories for new users (read-only templates)
+DEFAULT_CATEGORIES = (
+    MappingProxyType({"name": "Alimentação", "type": "EXPENSE", "color": "#ef4444", "icon": "utensils"}),
+    MappingProxyType({"name": "Transporte", "type": "EXPENSE", "color": "#f59e0b", "icon": "car"}),
+    MappingProxyType({"name": "Moradia", "type": "EXPENSE", "color": "#8b5cf6", "icon": "home"}),
+    MappingProxyType({"name": "Saúde", "type": "EXPENSE", "color": "#ec4899", "icon": "heart-pulse"}),
+    MappingProxyType({"name": "Educação", "type": "EXPENSE", "color": "#3b82f6", "icon": "graduation-cap"}),
+    MappingProxyType({"name": "Lazer", "type": "EXPENSE", "color": "#14b8a6", "icon": "gamepad-2"}),
+    MappingProxyType({"name": "Assinaturas", "type": "EXPENSE", "color": "#6366f1", "icon": "tv"}),
+    MappingProxyType({"name": "Investimentos", "type": "BOTH", "color": "#10b981", "icon": "trending-up"}),
+    MappingProxyType({"name": "Salário", "type": "INCOME", "color": "#22c55e", "icon": "wallet"}),
+    MappingProxyType({"name": "Freelance", "type": "INCOME", "color": "#06b6d4", "icon": "laptop"}),
+    MappingProxyType({"name": "Outros", "type": "BOTH", "color": "#71717a", "icon": "more-horizontal"}),
+)
 
 async def create_default_categories(user_id: str):
-    now = datetime.now(timezone.utc).isoformat()
-    categories = []
-    for cat in DEFAULT_CATEGORIES:
-        categories.append({
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "name": cat["name"],
-            "type": cat["type"],
-            "color": cat["color"],
-            "icon": cat["icon"],
-            "created_at": now
-        })
-    if categories:
-        await db.categories.insert_many(categories)
+    now = datetime.now(timezone.utc)
+    categories = [
+        {**template, "id": str(uuid.uuid4()), "user_id": user_id, "created_at": now}
+        for template in DEFAULT_CATEGORIES
+    ]
+    await db.categories.insert_many(categories)
 
 # ==================== AUTH ROUTES ====================
 
@@ -334,26 +542,26 @@ async def register(user_data: UserCreate):
         "id": user_id,
         "email": user_data.email.lower(),
         "name": user_data.name,
-        "password": pwd_context.hash(user_data.password),
+        "password": await hash_password(user_data.password),
         "theme": "dark",
-        "created_at": now.isoformat(),
-        "updated_at": now.isoformat()
+        "created_at": now,
+        "updated_at": now
     }
     
-    await db.users.insert_one(user_doc)
-    await create_default_categories(user_id)
+    access_token = create_access_token(user_id, now)
+    refresh_token = create_refresh_token(user_id, now)
     
-    access_token = create_access_token(user_id)
-    refresh_token = create_refresh_token(user_id)
+    # The unique email index settles concurrent sign-ups before anything else is written
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email já cadastrado")
     
-    # Store refresh token
-    await db.refresh_tokens.insert_one({
-        "id": str(uuid.uuid4()),
-        "user_id": user_id,
-        "token": refresh_token,
-        "created_at": now.isoformat(),
-        "expires_at": (now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)).isoformat()
-    })
+    # Independent writes to separate collections, issued concurrently
+    await asyncio.gather(
+        create_default_categories(user_id),
+        db.refresh_tokens.insert_one(refresh_token_doc(user_id, refresh_token, now))
+    )
     
     logger.info(f"New user registered: {user_data.email}")
     
@@ -378,29 +586,19 @@ async def login(credentials: UserLogin):
     
     user = await db.users.find_one({"email": email}, {"_id": 0})
     
-    if not user or not pwd_context.verify(credentials.password, user["password"]):
+    if not user or not await verify_password(credentials.password, user["password"]):
         record_login_attempt(email, False)
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
     
     record_login_attempt(email, True)
     
-    access_token = create_access_token(user["id"])
-    refresh_token = create_refresh_token(user["id"])
-    
     now = datetime.now(timezone.utc)
-    await db.refresh_tokens.insert_one({
-        "id": str(uuid.uuid4()),
-        "user_id": user["id"],
-        "token": refresh_token,
-        "created_at": now.isoformat(),
-        "expires_at": (now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)).isoformat()
-    })
+    access_token = create_access_token(user["id"], now)
+    refresh_token = create_refresh_token(user["id"], now)
     
-    logger.info(f"User logged in: {email}")
+    await db.refresh_tokens.insert_one(refresh_token_doc(user["id"], refresh_token, now))
     
-    created_at = user.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    logger.info(f"User logged in: {email}")
     
     return TokenResponse(
         access_token=access_token,
@@ -410,14 +608,14 @@ async def login(credentials: UserLogin):
             email=user["email"],
             name=user["name"],
             theme=user.get("theme", "dark"),
-            created_at=created_at
+            created_at=user["created_at"]
         )
     )
 
 @auth_router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(data: RefreshTokenRequest):
     try:
-        payload = jwt.decode(data.refresh_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(data.refresh_token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options=JWT_DECODE_OPTIONS)
         if payload.get("type") != "refresh":
             raise HTTPException(status_code=401, detail="Token inválido")
         user_id = payload.get("sub")
@@ -426,34 +624,23 @@ async def refresh_token(data: RefreshTokenRequest):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token inválido")
     
-    # Verify token exists in DB
-    stored_token = await db.refresh_tokens.find_one({"token": data.refresh_token, "user_id": user_id})
-    if not stored_token:
+    # Consume the old refresh token and load the user concurrently;
+    # a zero deleted_count means the token was never issued or already revoked
+    deleted, user = await asyncio.gather(
+        db.refresh_tokens.delete_one({"token_hash": hash_refresh_token(data.refresh_token), "user_id": user_id}),
+        db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+    )
+    if not deleted.deleted_count:
         raise HTTPException(status_code=401, detail="Token inválido ou revogado")
-    
-    # Delete old refresh token
-    await db.refresh_tokens.delete_one({"token": data.refresh_token})
-    
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
     if not user:
         raise HTTPException(status_code=401, detail="Usuário não encontrado")
     
     # Create new tokens
-    access_token = create_access_token(user_id)
-    new_refresh_token = create_refresh_token(user_id)
-    
     now = datetime.now(timezone.utc)
-    await db.refresh_tokens.insert_one({
-        "id": str(uuid.uuid4()),
-        "user_id": user_id,
-        "token": new_refresh_token,
-        "created_at": now.isoformat(),
-        "expires_at": (now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)).isoformat()
-    })
+    access_token = create_access_token(user_id, now)
+    new_refresh_token = create_refresh_token(user_id, now)
     
-    created_at = user.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    await db.refresh_tokens.insert_one(refresh_token_doc(user_id, new_refresh_token, now))
     
     return TokenResponse(
         access_token=access_token,
@@ -463,27 +650,23 @@ async def refresh_token(data: RefreshTokenRequest):
             email=user["email"],
             name=user["name"],
             theme=user.get("theme", "dark"),
-            created_at=created_at
+            created_at=user["created_at"]
         )
     )
 
 @auth_router.post("/logout")
 async def logout(data: RefreshTokenRequest):
-    await db.refresh_tokens.delete_one({"token": data.refresh_token})
+    await db.refresh_tokens.delete_one({"token_hash": hash_refresh_token(data.refresh_token)})
     return {"message": "Logout realizado com sucesso"}
 
 @auth_router.get("/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
-    created_at = current_user.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    
     return UserResponse(
         id=current_user["id"],
         email=current_user["email"],
         name=current_user["name"],
         theme=current_user.get("theme", "dark"),
-        created_at=created_at
+        created_at=current_user["created_at"]
     )
 
 @auth_router.patch("/settings", response_model=UserResponse)
@@ -494,21 +677,23 @@ async def update_settings(settings: UserSettingsUpdate, current_user: dict = Dep
     if settings.theme is not None:
         update_data["theme"] = settings.theme
     
+    user = current_user
     if update_data:
-        update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-        await db.users.update_one({"id": current_user["id"]}, {"$set": update_data})
-    
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
-    created_at = user.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        update_data["updated_at"] = datetime.now(timezone.utc)
+        user = await db.users.find_one_and_update(
+            {"id": current_user["id"]},
+            {"$set": update_data},
+            projection={"_id": 0, "password": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        user_cache.pop(current_user["id"], None)
     
     return UserResponse(
         id=user["id"],
         email=user["email"],
         name=user["name"],
         theme=user.get("theme", "dark"),
-        created_at=created_at
+        created_at=user["created_at"]
     )
 
 # ==================== CATEGORIES ROUTES ====================
@@ -516,58 +701,56 @@ async def update_settings(settings: UserSettingsUpdate, current_user: dict = Dep
 @categories_router.get("", response_model=List[CategoryResponse])
 async def list_categories(
     type: Optional[Literal["INCOME", "EXPENSE", "BOTH"]] = None,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    query = {"user_id": current_user["id"]}
+    query = {"user_id": user_id}
     if type:
         query["$or"] = [{"type": type}, {"type": "BOTH"}]
     
-    categories = await db.categories.find(query, {"_id": 0}).sort("name", 1).to_list(100)
+    # No fixed cap; the collation lets the sort walk the user_id_name_ci index
+    cursor = db.categories.find(query, CATEGORY_PROJECTION, collation=CATEGORY_NAME_COLLATION).sort("name", 1)
     
     result = []
-    for cat in categories:
-        created_at = cat.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        result.append(CategoryResponse(
+    async for cat in cursor:
+        result.append(CategoryResponse.model_construct(
             id=cat["id"],
             user_id=cat["user_id"],
             name=cat["name"],
             type=cat["type"],
             color=cat["color"],
             icon=cat.get("icon"),
-            created_at=created_at
+            created_at=cat["created_at"]
         ))
     
-    return result
+    return Response(CATEGORY_LIST_ADAPTER.dump_json(result), media_type="application/json")
 
 @categories_router.post("", response_model=CategoryResponse, status_code=201)
 async def create_category(
     category: CategoryCreate,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     # Check unique name for user (case-insensitive)
-    existing = await db.categories.find_one({
-        "user_id": current_user["id"],
-        "name": {"$regex": f"^{category.name}$", "$options": "i"}
-    })
+    existing = await db.categories.find_one(
+        {"user_id": user_id, "name": category.name},
+        collation=CATEGORY_NAME_COLLATION
+    )
     if existing:
         raise HTTPException(status_code=400, detail="Categoria já existe")
     
     now = datetime.now(timezone.utc)
     cat_doc = {
         "id": str(uuid.uuid4()),
-        "user_id": current_user["id"],
+        "user_id": user_id,
         "name": category.name,
         "type": category.type,
         "color": category.color,
         "icon": category.icon,
-        "created_at": now.isoformat()
+        "created_at": now
     }
     
     await db.categories.insert_one(cat_doc)
     
-    return CategoryResponse(
+    return CategoryResponse.model_construct(
         id=cat_doc["id"],
         user_id=cat_doc["user_id"],
         name=cat_doc["name"],
@@ -580,79 +763,73 @@ async def create_category(
 @categories_router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: str,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     category = await db.categories.find_one(
-        {"id": category_id, "user_id": current_user["id"]},
+        {"id": category_id, "user_id": user_id},
         {"_id": 0}
     )
     if not category:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
     
-    created_at = category.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    
-    return CategoryResponse(
+    return CategoryResponse.model_construct(
         id=category["id"],
         user_id=category["user_id"],
         name=category["name"],
         type=category["type"],
         color=category["color"],
         icon=category.get("icon"),
-        created_at=created_at
+        created_at=category["created_at"]
     )
 
 @categories_router.patch("/{category_id}", response_model=CategoryResponse)
 async def update_category(
     category_id: str,
     update: CategoryUpdate,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    category = await db.categories.find_one(
-        {"id": category_id, "user_id": current_user["id"]},
-        {"_id": 0}
-    )
-    if not category:
-        raise HTTPException(status_code=404, detail="Categoria não encontrada")
-    
     update_data = update.model_dump(exclude_unset=True)
     
     if "name" in update_data:
-        existing = await db.categories.find_one({
-            "user_id": current_user["id"],
-            "name": {"$regex": f"^{update_data['name']}$", "$options": "i"},
-            "id": {"$ne": category_id}
-        })
+        existing = await db.categories.find_one(
+            {"user_id": user_id, "name": update_data["name"], "id": {"$ne": category_id}},
+            collation=CATEGORY_NAME_COLLATION
+        )
         if existing:
             raise HTTPException(status_code=400, detail="Categoria já existe")
     
+    owner_filter = {"id": category_id, "user_id": user_id}
     if update_data:
-        await db.categories.update_one({"id": category_id}, {"$set": update_data})
-    
-    updated = await db.categories.find_one({"id": category_id}, {"_id": 0})
-    created_at = updated.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        updated = await db.categories.find_one_and_update(
+            owner_filter,
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        category_cache.pop((user_id, category_id), None)
+    else:
+        updated = await db.categories.find_one(owner_filter, {"_id": 0})
+    if not updated:
+        raise HTTPException(status_code=404, detail="Categoria não encontrada")
     
-    return CategoryResponse(
+    return CategoryResponse.model_construct(
         id=updated["id"],
         user_id=updated["user_id"],
         name=updated["name"],
         type=updated["type"],
         color=updated["color"],
         icon=updated.get("icon"),
-        created_at=created_at
+        created_at=updated["created_at"]
     )
 
 @categories_router.delete("/{category_id}")
 async def delete_category(
     category_id: str,
     reassign_to: Optional[str] = Query(None),
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     category = await db.categories.find_one(
-        {"id": category_id, "user_id": current_user["id"]},
+        {"id": category_id, "user_id": user_id},
         {"_id": 0}
     )
     if not category:
@@ -661,7 +838,7 @@ async def delete_category(
     # Check for transactions
     tx_count = await db.transactions.count_documents({
         "category_id": category_id,
-        "user_id": current_user["id"],
+        "user_id": user_id,
         "deleted_at": None
     })
     
@@ -673,20 +850,18 @@ async def delete_category(
             )
         
         # Verify reassign category exists
-        reassign_cat = await db.categories.find_one({
-            "id": reassign_to,
-            "user_id": current_user["id"]
-        })
+        reassign_cat = await get_user_category(user_id, reassign_to)
         if not reassign_cat:
             raise HTTPException(status_code=400, detail="Categoria de reatribuição não encontrada")
         
         # Reassign transactions
         await db.transactions.update_many(
-            {"category_id": category_id, "user_id": current_user["id"]},
+            {"category_id": category_id, "user_id": user_id},
             {"$set": {"category_id": reassign_to}}
         )
     
     await db.categories.delete_one({"id": category_id})
+    category_cache.pop((user_id, category_id), None)
     return {"message": "Categoria deletada com sucesso"}
 
 # ==================== TRANSACTIONS ROUTES ====================
@@ -702,23 +877,23 @@ async def list_transactions(
     search: Optional[str] = None,
     sort_by: Literal["date", "amount", "created_at"] = "date",
     sort_order: Literal["asc", "desc"] = "desc",
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    query = {"user_id": current_user["id"], "deleted_at": None}
+    query = {"user_id": user_id, "deleted_at": None}
     
     # Date filter
     if start_date or end_date:
         date_query = {}
         if start_date:
-            date_query["$gte"] = start_date
+            date_query["$gte"] = parse_date_param(start_date)
         if end_date:
-            date_query["$lte"] = end_date + "T23:59:59"
+            date_query["$lte"] = parse_date_param(end_date, end_of_day=True)
         query["date"] = date_query
     else:
         # Default: last 30 days
         end = datetime.now(BRAZIL_TZ)
         start = end - timedelta(days=30)
-        query["date"] = {"$gte": start.isoformat(), "$lte": end.isoformat()}
+        query["date"] = {"$gte": start, "$lte": end}
     
     if type:
         query["type"] = type
@@ -732,73 +907,60 @@ async def list_transactions(
             {"notes": {"$regex": search, "$options": "i"}}
         ]
     
-    # Count total
-    total = await db.transactions.count_documents(query)
-    
     # Sort
     sort_dir = 1 if sort_order == "asc" else -1
-    sort_field = sort_by if sort_by != "created_at" else "created_at"
+    sort_field = "amount_cents" if sort_by == "amount" else sort_by
     
-    # Fetch with pagination
+    # Fetch the page joined with category names; $match/$sort lead so indexes apply
     skip = (page - 1) * page_size
-    transactions = await db.transactions.find(query, {"_id": 0}).sort(sort_field, sort_dir).skip(skip).limit(page_size).to_list(page_size)
-    
-    # Get categories for names
-    cat_ids = list(set(t["category_id"] for t in transactions))
-    categories = {}
-    if cat_ids:
-        cats = await db.categories.find({"id": {"$in": cat_ids}}, {"_id": 0}).to_list(len(cat_ids))
-        categories = {c["id"]: c for c in cats}
+    pipeline = [
+        {"$match": query},
+        {"$sort": {sort_field: sort_dir}},
+        {"$skip": skip},
+        {"$limit": page_size},
+        *CATEGORY_LOOKUP_STAGES,
+    ]
+    total, transactions = await asyncio.gather(
+        db.transactions.count_documents(query),
+        db.transactions.aggregate(pipeline).to_list(page_size)
+    )
     
     result = []
     for t in transactions:
-        cat = categories.get(t["category_id"], {})
-        date_val = t.get("date")
-        if isinstance(date_val, str):
-            date_val = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
-        created_at = t.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        updated_at = t.get("updated_at")
-        if isinstance(updated_at, str):
-            updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-        
-        result.append(TransactionResponse(
+        result.append(TransactionResponse.model_construct(
             id=t["id"],
             user_id=t["user_id"],
             type=t["type"],
             description=t["description"],
             amount=t["amount"],
-            date=date_val,
+            date=t["date"],
             category_id=t["category_id"],
-            category_name=cat.get("name"),
-            category_color=cat.get("color"),
+            category_name=t.get("category_name"),
+            category_color=t.get("category_color"),
             payment_method=t.get("payment_method"),
             notes=t.get("notes"),
-            created_at=created_at,
-            updated_at=updated_at
+            created_at=t["created_at"],
+            updated_at=t["updated_at"]
         ))
     
     total_pages = (total + page_size - 1) // page_size
     
-    return TransactionListResponse(
+    page_body = TransactionListResponse.model_construct(
         items=result,
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages
     )
+    return Response(page_body.model_dump_json(), media_type="application/json")
 
 @transactions_router.post("", response_model=TransactionResponse, status_code=201)
 async def create_transaction(
     transaction: TransactionCreate,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     # Verify category exists and belongs to user
-    category = await db.categories.find_one({
-        "id": transaction.category_id,
-        "user_id": current_user["id"]
-    }, {"_id": 0})
+    category = await get_user_category(user_id, transaction.category_id)
     
     if not category:
         raise HTTPException(status_code=400, detail="Categoria não encontrada")
@@ -808,148 +970,119 @@ async def create_transaction(
         raise HTTPException(status_code=400, detail="Tipo de categoria incompatível com o tipo de transação")
     
     now = datetime.now(timezone.utc)
-    tx_doc = {
-        "id": str(uuid.uuid4()),
-        "user_id": current_user["id"],
-        "type": transaction.type,
-        "description": transaction.description,
-        "amount": round(transaction.amount, 2),
-        "date": transaction.date.isoformat(),
-        "category_id": transaction.category_id,
-        "payment_method": transaction.payment_method,
-        "notes": transaction.notes,
-        "created_at": now.isoformat(),
-        "updated_at": now.isoformat(),
-        "deleted_at": None
-    }
-    
-    await db.transactions.insert_one(tx_doc)
-    
-    return TransactionResponse(
-        id=tx_doc["id"],
-        user_id=tx_doc["user_id"],
-        type=tx_doc["type"],
-        description=tx_doc["description"],
-        amount=tx_doc["amount"],
-        date=transaction.date,
-        category_id=tx_doc["category_id"],
-        category_name=category["name"],
-        category_color=category["color"],
-        payment_method=tx_doc["payment_method"],
-        notes=tx_doc["notes"],
+    row = TxRow(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        type=transaction.type,
+        description=transaction.description,
+        amount_cents=to_cents(transaction.amount),
+        date=to_aware(transaction.date),
+        category_id=transaction.category_id,
+        payment_method=transaction.payment_method,
+        notes=transaction.notes,
         created_at=now,
         updated_at=now
     )
+    tx_doc = asdict(row)
+    await db.transactions.insert_one(tx_doc)
+    
+    # Reuse the inserted dict as the response body (insert_one added _id to it)
+    del tx_doc["_id"], tx_doc["deleted_at"]
+    tx_doc["amount"] = from_cents(tx_doc.pop("amount_cents"))
+    tx_doc["category_name"] = category["name"]
+    tx_doc["category_color"] = category["color"]
+    return AppJSONResponse(tx_doc, status_code=201)
 
 @transactions_router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: str,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    transaction = await db.transactions.find_one(
-        {"id": transaction_id, "user_id": current_user["id"], "deleted_at": None},
-        {"_id": 0}
-    )
-    if not transaction:
+    found = await db.transactions.aggregate([
+        {"$match": {"id": transaction_id, "user_id": user_id, "deleted_at": None}},
+        *CATEGORY_LOOKUP_STAGES,
+    ]).to_list(1)
+    if not found:
         raise HTTPException(status_code=404, detail="Transação não encontrada")
+    transaction = found[0]
     
-    category = await db.categories.find_one({"id": transaction["category_id"]}, {"_id": 0})
-    
-    date_val = transaction.get("date")
-    if isinstance(date_val, str):
-        date_val = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
-    created_at = transaction.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    updated_at = transaction.get("updated_at")
-    if isinstance(updated_at, str):
-        updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-    
-    return TransactionResponse(
+    return TransactionResponse.model_construct(
         id=transaction["id"],
         user_id=transaction["user_id"],
         type=transaction["type"],
         description=transaction["description"],
         amount=transaction["amount"],
-        date=date_val,
+        date=transaction["date"],
         category_id=transaction["category_id"],
-        category_name=category["name"] if category else None,
-        category_color=category["color"] if category else None,
+        category_name=transaction.get("category_name"),
+        category_color=transaction.get("category_color"),
         payment_method=transaction.get("payment_method"),
         notes=transaction.get("notes"),
-        created_at=created_at,
-        updated_at=updated_at
+        created_at=transaction["created_at"],
+        updated_at=transaction["updated_at"]
     )
 
 @transactions_router.patch("/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(
     transaction_id: str,
     update: TransactionUpdate,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    transaction = await db.transactions.find_one(
-        {"id": transaction_id, "user_id": current_user["id"], "deleted_at": None},
-        {"_id": 0}
-    )
-    if not transaction:
-        raise HTTPException(status_code=404, detail="Transação não encontrada")
-    
     update_data = update.model_dump(exclude_unset=True)
     
+    category = None
     if "category_id" in update_data:
-        category = await db.categories.find_one({
-            "id": update_data["category_id"],
-            "user_id": current_user["id"]
-        })
+        category = await get_user_category(user_id, update_data["category_id"])
         if not category:
             raise HTTPException(status_code=400, detail="Categoria não encontrada")
     
     if "date" in update_data and update_data["date"]:
-        update_data["date"] = update_data["date"].isoformat()
+        update_data["date"] = to_aware(update_data["date"])
     
     if "amount" in update_data:
-        update_data["amount"] = round(update_data["amount"], 2)
+        update_data["amount_cents"] = to_cents(update_data.pop("amount"))
     
+    # The ownership filter doubles as the existence check
+    owner_filter = {"id": transaction_id, "user_id": user_id, "deleted_at": None}
     if update_data:
-        update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-        await db.transactions.update_one({"id": transaction_id}, {"$set": update_data})
-    
-    updated = await db.transactions.find_one({"id": transaction_id}, {"_id": 0})
-    category = await db.categories.find_one({"id": updated["category_id"]}, {"_id": 0})
-    
-    date_val = updated.get("date")
-    if isinstance(date_val, str):
-        date_val = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
-    created_at = updated.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    updated_at = updated.get("updated_at")
-    if isinstance(updated_at, str):
-        updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-    
-    return TransactionResponse(
-        id=updated["id"],
-        user_id=updated["user_id"],
-        type=updated["type"],
-        description=updated["description"],
-        amount=updated["amount"],
-        date=date_val,
-        category_id=updated["category_id"],
-        category_name=category["name"] if category else None,
-        category_color=category["color"] if category else None,
-        payment_method=updated.get("payment_method"),
-        notes=updated.get("notes"),
-        created_at=created_at,
-        updated_at=updated_at
-    )
+        update_data["updated_at"] = datetime.now(timezone.utc)
+        updated = await db.transactions.find_one_and_update(
+            owner_filter,
+            {"$set": update_data},
+            projection=TRANSACTION_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        updated = await db.transactions.find_one(owner_filter, TRANSACTION_PROJECTION)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Transação não encontrada")
+    
+    if category is None:
+        category = await get_user_category(user_id, updated["category_id"]) or {}
+    
+    return AppJSONResponse({
+        "id": updated["id"],
+        "user_id": updated["user_id"],
+        "type": updated["type"],
+        "description": updated["description"],
+        "amount": from_cents(updated["amount_cents"]),
+        "date": updated["date"],
+        "category_id": updated["category_id"],
+        "category_name": category.get("name"),
+        "category_color": category.get("color"),
+        "payment_method": updated.get("payment_method"),
+        "notes": updated.get("notes"),
+        "created_at": updated["created_at"],
+        "updated_at": updated.get("updated_at")
+    })
 
 @transactions_router.delete("/{transaction_id}")
 async def delete_transaction(
     transaction_id: str,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     transaction = await db.transactions.find_one(
-        {"id": transaction_id, "user_id": current_user["id"], "deleted_at": None},
+        {"id": transaction_id, "user_id": user_id, "deleted_at": None},
         {"_id": 0}
     )
     if not transaction:
@@ -958,167 +1091,209 @@ async def delete_transaction(
     # Soft delete
     await db.transactions.update_one(
         {"id": transaction_id},
-        {"$set": {"deleted_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"deleted_at": datetime.now(timezone.utc)}}
     )
     
     return {"message": "Transação deletada com sucesso"}
 
+# ==================== REPORT HELPERS ====================
+
+# Calendar day of a transaction in the app timezone
+LOCAL_DAY_EXPR = {"$dateToString": {"format": "%Y-%m-%d", "date": "$date", "timezone": BRAZIL_TZ.key}}
+
+# Income/expense sums in cents, converted to reais once per output row
+INCOME_EXPENSE_SUMS = {
+    "income": {"$sum": {"$cond": [{"$eq": ["$type", "INCOME"]}, "$amount_cents", 0]}},
+    "expense": {"$sum": {"$cond": [{"$eq": ["$type", "EXPENSE"]}, "$amount_cents", 0]}},
+}
+INCOME_EXPENSE_FIELDS = {
+    "income": {"$divide": ["$income", 100]},
+    "expense": {"$divide": ["$expense", 100]},
+}
+
+# Per-day income/expense totals, sorted by day
+DAILY_TOTALS_STAGES = [
+    {"$group": {"_id": LOCAL_DAY_EXPR, **INCOME_EXPENSE_SUMS}},
+    {"$sort": {"_id": 1}},
+    {"$project": {"_id": 0, "date": "$_id", **INCOME_EXPENSE_FIELDS}},
+]
+
+# Daily totals plus the day's net balance
+DAILY_BALANCE_STAGES = [
+    *DAILY_TOTALS_STAGES[:-1],
+    {"$project": {
+        "_id": 0,
+        "date": "$_id",
+        **INCOME_EXPENSE_FIELDS,
+        "balance": {"$divide": [{"$subtract": ["$income", "$expense"]}, 100]},
+    }},
+]
+
+# Per-month (YYYY-MM, app timezone) income/expense totals
+MONTHLY_TOTALS_STAGES = [
+    {"$group": {
+        "_id": {"$dateToString": {"format": "%Y-%m", "date": "$date", "timezone": BRAZIL_TZ.key}},
+        **INCOME_EXPENSE_SUMS,
+    }},
+    {"$project": {"_id": 0, "month": "$_id", **INCOME_EXPENSE_FIELDS}},
+]
+
+def expense_by_category_stages(default_name: str, limit: Optional[int] = None) -> list:
+    """Expense totals per category, labelled with the category name/color."""
+    stages = [
+        {"$match": {"type": "EXPENSE"}},
+        {"$group": {"_id": "$category_id", "amount": {"$sum": "$amount_cents"}}},
+    ]
+    if limit:
+        stages += [{"$sort": {"amount": -1}}, {"$limit": limit}]
+    stages += [
+        {"$lookup": {"from": "categories", "localField": "_id", "foreignField": "id", "as": "cat"}},
+        {"$project": {
+            "_id": 0,
+            "category_id": "$_id",
+            "name": {"$ifNull": [{"$arrayElemAt": ["$cat.name", 0]}, default_name]},
+            "color": {"$ifNull": [{"$arrayElemAt": ["$cat.color", 0]}, "#71717a"]},
+            "amount": {"$divide": ["$amount", 100]},
+        }},
+    ]
+    return stages
+
+# Total amount in cents per transaction type
+TYPE_TOTALS_STAGES = [{"$group": {"_id": "$type", "sum": {"$sum": "$amount_cents"}}}]
+
+def sum_cents_if(*conditions: dict) -> dict:
+    """$sum of amount_cents over the documents matching every condition."""
+    return {"$sum": {"$cond": [{"$and": list(conditions)}, "$amount_cents", 0]}}
+
+def totals_by_type(rows: list) -> dict:
+    return {r["_id"]: r["sum"] for r in rows}
+
+# Portuguese labels used in the CSV export
+TRANSACTION_TYPE_LABELS = {"INCOME": "Receita", "EXPENSE": "Despesa"}
+PAYMENT_METHOD_LABELS = {"CASH": "Dinheiro", "DEBIT": "Débito", "CREDIT": "Crédito", "PIX": "PIX", "TRANSFER": "Transferência"}
+
+class _Echo:
+    """File-like sink for csv.writer that hands each formatted line back."""
+    def write(self, value: str) -> str:
+        return value
+
 # ==================== REPORTS ROUTES ====================
 
 @reports_router.get("/monthly", response_model=MonthlyReportResponse)
 async def get_monthly_report(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2000, le=2100),
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     # Calculate date range for current month
-    start_date = datetime(year, month, 1, tzinfo=BRAZIL_TZ)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)
-    else:
-        end_date = datetime(year, month + 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)
-    
-    # Get transactions for current month
-    query = {
-        "user_id": current_user["id"],
-        "deleted_at": None,
-        "date": {"$gte": start_date.isoformat(), "$lte": end_date.isoformat()}
-    }
-    
-    transactions = await db.transactions.find(query, {"_id": 0}).to_list(10000)
-    
-    total_income = sum(t["amount"] for t in transactions if t["type"] == "INCOME")
-    total_expense = sum(t["amount"] for t in transactions if t["type"] == "EXPENSE")
-    balance = total_income - total_expense
+    start_date, end_date = month_bounds(year, month)
     
     # Previous month for comparison
-    if month == 1:
-        prev_month, prev_year = 12, year - 1
-    else:
-        prev_month, prev_year = month - 1, year
-    
-    prev_start = datetime(prev_year, prev_month, 1, tzinfo=BRAZIL_TZ)
-    if prev_month == 12:
-        prev_end = datetime(prev_year + 1, 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)
-    else:
-        prev_end = datetime(prev_year, prev_month + 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)
+    prev_start = start_date - relativedelta(months=1)
     
-    prev_query = {
-        "user_id": current_user["id"],
+    # Both months are scanned once; the totals split them with $cond in a single $group
+    query = {
+        "user_id": user_id,
         "deleted_at": None,
-        "date": {"$gte": prev_start.isoformat(), "$lte": prev_end.isoformat()}
+        "date": {"$gte": prev_start, "$lt": end_date}
     }
+    is_income = {"$eq": ["$type", "INCOME"]}
+    is_expense = {"$eq": ["$type", "EXPENSE"]}
+    in_month = {"$gte": ["$date", start_date]}
+    in_prev_month = {"$lt": ["$date", start_date]}
+    
+    report = (await db.transactions.aggregate([
+        {"$match": query},
+        {"$facet": {
+            "totals": [{"$group": {
+                "_id": None,
+                "income": sum_cents_if(is_income, in_month),
+                "expense": sum_cents_if(is_expense, in_month),
+                "prev_income": sum_cents_if(is_income, in_prev_month),
+                "prev_expense": sum_cents_if(is_expense, in_prev_month),
+            }}],
+            "top_categories": [{"$match": {"date": {"$gte": start_date}}}, *expense_by_category_stages("Desconhecida", limit=5)],
+            "daily": [{"$match": {"date": {"$gte": start_date}}}, *DAILY_BALANCE_STAGES],
+        }},
+    ]).to_list(1))[0]
+    
+    totals = report["totals"][0] if report["totals"] else {}
+    total_income = totals.get("income", 0)
+    total_expense = totals.get("expense", 0)
+    balance = total_income - total_expense
     
-    prev_transactions = await db.transactions.find(prev_query, {"_id": 0}).to_list(10000)
-    prev_income = sum(t["amount"] for t in prev_transactions if t["type"] == "INCOME")
-    prev_expense = sum(t["amount"] for t in prev_transactions if t["type"] == "EXPENSE")
+    prev_income = totals.get("prev_income", 0)
+    prev_expense = totals.get("prev_expense", 0)
     
     income_change = ((total_income - prev_income) / prev_income * 100) if prev_income > 0 else None
     expense_change = ((total_expense - prev_expense) / prev_expense * 100) if prev_expense > 0 else None
     
-    # Top expense categories
-    expense_by_category = {}
-    for t in transactions:
-        if t["type"] == "EXPENSE":
-            cat_id = t["category_id"]
-            expense_by_category[cat_id] = expense_by_category.get(cat_id, 0) + t["amount"]
-    
-    # Get category names
-    cat_ids = list(expense_by_category.keys())
-    categories = {}
-    if cat_ids:
-        cats = await db.categories.find({"id": {"$in": cat_ids}}, {"_id": 0}).to_list(len(cat_ids))
-        categories = {c["id"]: c for c in cats}
-    
-    top_categories = sorted(
-        [{"category_id": k, "name": categories.get(k, {}).get("name", "Desconhecida"), "color": categories.get(k, {}).get("color", "#71717a"), "amount": v} 
-         for k, v in expense_by_category.items()],
-        key=lambda x: x["amount"],
-        reverse=True
-    )[:5]
-    
-    # Daily balance evolution
-    daily_data = {}
-    for t in transactions:
-        date_str = t["date"][:10]
-        if date_str not in daily_data:
-            daily_data[date_str] = {"income": 0, "expense": 0}
-        if t["type"] == "INCOME":
-            daily_data[date_str]["income"] += t["amount"]
-        else:
-            daily_data[date_str]["expense"] += t["amount"]
-    
-    daily_balance = [
-        {"date": k, "income": v["income"], "expense": v["expense"], "balance": v["income"] - v["expense"]}
-        for k, v in sorted(daily_data.items())
-    ]
-    
-    return MonthlyReportResponse(
-        month=month,
-        year=year,
-        total_income=round(total_income, 2),
-        total_expense=round(total_expense, 2),
-        balance=round(balance, 2),
-        income_change=round(income_change, 2) if income_change is not None else None,
-        expense_change=round(expense_change, 2) if expense_change is not None else None,
-        top_expense_categories=top_categories,
-        daily_balance=daily_balance
-    )
+    top_categories = report["top_categories"]
+    
+    return AppJSONResponse({
+        "month": month,
+        "year": year,
+        "total_income": from_cents(total_income),
+        "total_expense": from_cents(total_expense),
+        "balance": from_cents(balance),
+        "income_change": round(income_change, 2) if income_change is not None else None,
+        "expense_change": round(expense_change, 2) if expense_change is not None else None,
+        "top_expense_categories": top_categories,
+        "daily_balance": report["daily"]
+    })
 
 @reports_router.get("/dashboard", response_model=DashboardResponse)
 async def get_dashboard(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    # Default: current month
+    # Default: current month. The range is half-open: [start_dt, end_dt)
     now = datetime.now(BRAZIL_TZ)
-    if not start_date:
-        start_date = datetime(now.year, now.month, 1, tzinfo=BRAZIL_TZ).isoformat()
-    if not end_date:
-        if now.month == 12:
-            end_date = (datetime(now.year + 1, 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)).isoformat()
-        else:
-            end_date = (datetime(now.year, now.month + 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)).isoformat()
-    
-    # Get all user transactions (for total balance)
-    all_transactions = await db.transactions.find(
-        {"user_id": current_user["id"], "deleted_at": None},
-        {"_id": 0}
-    ).to_list(100000)
-    
-    total_all_income = sum(t["amount"] for t in all_transactions if t["type"] == "INCOME")
-    total_all_expense = sum(t["amount"] for t in all_transactions if t["type"] == "EXPENSE")
-    current_balance = total_all_income - total_all_expense
-    
-    # Period transactions
-    period_query = {
-        "user_id": current_user["id"],
-        "deleted_at": None,
-        "date": {"$gte": start_date, "$lte": end_date}
-    }
-    period_transactions = await db.transactions.find(period_query, {"_id": 0}).to_list(10000)
-    
-    total_income = sum(t["amount"] for t in period_transactions if t["type"] == "INCOME")
-    total_expense = sum(t["amount"] for t in period_transactions if t["type"] == "EXPENSE")
+    month_start, month_end = month_bounds(now.year, now.month)
+    start_dt = parse_date_param(start_date) if start_date else month_start
+    if end_date:
+        # Inclusive end of day (or exact instant) -> exclusive bound
+        end_dt = parse_date_param(end_date, end_of_day=True) + timedelta(microseconds=1)
+    else:
+        end_dt = month_end
     
     # Previous period comparison (same duration before start_date)
-    start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-    end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-    period_days = (end_dt - start_dt).days + 1
-    
-    prev_end = start_dt - timedelta(seconds=1)
-    prev_start = prev_end - timedelta(days=period_days)
-    
-    prev_query = {
-        "user_id": current_user["id"],
-        "deleted_at": None,
-        "date": {"$gte": prev_start.isoformat(), "$lte": prev_end.isoformat()}
-    }
-    prev_transactions = await db.transactions.find(prev_query, {"_id": 0}).to_list(10000)
-    
-    prev_income = sum(t["amount"] for t in prev_transactions if t["type"] == "INCOME")
-    prev_expense = sum(t["amount"] for t in prev_transactions if t["type"] == "EXPENSE")
+    period_days = (end_dt - start_dt).days
+    prev_start = start_dt - timedelta(days=period_days)
+    
+    # Monthly comparison window (last 6 months)
+    window_start = month_start - relativedelta(months=5)
+    window_end = month_end
+    months = [window_start + relativedelta(months=i) for i in range(6)]
+    
+    in_period = {"$match": {"date": {"$gte": start_dt, "$lt": end_dt}}}
+    
+    # Every dashboard figure comes from the user's live transactions in one round-trip
+    dashboard = (await db.transactions.aggregate([
+        {"$match": {"user_id": user_id, "deleted_at": None}},
+        {"$facet": {
+            "all_totals": TYPE_TOTALS_STAGES,
+            "period_totals": [in_period, *TYPE_TOTALS_STAGES],
+            "by_category": [in_period, *expense_by_category_stages("Outros")],
+            "daily": [in_period, *DAILY_TOTALS_STAGES],
+            "prev_totals": [{"$match": {"date": {"$gte": prev_start, "$lt": start_dt}}}, *TYPE_TOTALS_STAGES],
+            "monthly": [{"$match": {"date": {"$gte": window_start, "$lt": window_end}}}, *MONTHLY_TOTALS_STAGES],
+            "recent": [{"$sort": {"date": -1}}, {"$limit": 5}, *CATEGORY_LOOKUP_STAGES],
+        }},
+    ]).to_list(1))[0]
+    
+    # Total balance across all transactions
+    all_totals = totals_by_type(dashboard["all_totals"])
+    current_balance = all_totals.get("INCOME", 0) - all_totals.get("EXPENSE", 0)
+    
+    period_totals = totals_by_type(dashboard["period_totals"])
+    total_income = period_totals.get("INCOME", 0)
+    total_expense = period_totals.get("EXPENSE", 0)
+    
+    prev_totals = totals_by_type(dashboard["prev_totals"])
+    prev_income = prev_totals.get("INCOME", 0)
+    prev_expense = prev_totals.get("EXPENSE", 0)
     prev_balance = prev_income - prev_expense
     current_period_balance = total_income - total_expense
     
@@ -1128,116 +1303,51 @@ async def get_dashboard(
         income_vs_expense_change = 100 if current_period_balance > 0 else 0
     
     # Expenses by category
-    expense_by_category = {}
-    for t in period_transactions:
-        if t["type"] == "EXPENSE":
-            cat_id = t["category_id"]
-            expense_by_category[cat_id] = expense_by_category.get(cat_id, 0) + t["amount"]
-    
-    cat_ids = list(expense_by_category.keys())
-    categories = {}
-    if cat_ids:
-        cats = await db.categories.find({"id": {"$in": cat_ids}}, {"_id": 0}).to_list(len(cat_ids))
-        categories = {c["id"]: c for c in cats}
-    
-    expenses_by_cat = [
-        {"category_id": k, "name": categories.get(k, {}).get("name", "Outros"), "color": categories.get(k, {}).get("color", "#71717a"), "amount": v}
-        for k, v in expense_by_category.items()
-    ]
-    
-    # Daily income vs expense
-    daily_data = {}
-    for t in period_transactions:
-        date_str = t["date"][:10]
-        if date_str not in daily_data:
-            daily_data[date_str] = {"income": 0, "expense": 0}
-        if t["type"] == "INCOME":
-            daily_data[date_str]["income"] += t["amount"]
-        else:
-            daily_data[date_str]["expense"] += t["amount"]
-    
-    income_vs_expense_daily = [
-        {"date": k, "income": round(v["income"], 2), "expense": round(v["expense"], 2)}
-        for k, v in sorted(daily_data.items())
-    ]
+    expenses_by_cat = dashboard["by_category"]
     
     # Monthly comparison (last 6 months)
+    monthly_totals = {r["month"]: r for r in dashboard["monthly"]}
+    
+    month_names = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
     monthly_comparison = []
-    for i in range(5, -1, -1):
-        m = now.month - i
-        y = now.year
-        while m <= 0:
-            m += 12
-            y -= 1
-        
-        m_start = datetime(y, m, 1, tzinfo=BRAZIL_TZ)
-        if m == 12:
-            m_end = datetime(y + 1, 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)
-        else:
-            m_end = datetime(y, m + 1, 1, tzinfo=BRAZIL_TZ) - timedelta(seconds=1)
-        
-        m_income = sum(t["amount"] for t in all_transactions if t["type"] == "INCOME" and m_start.isoformat() <= t["date"] <= m_end.isoformat())
-        m_expense = sum(t["amount"] for t in all_transactions if t["type"] == "EXPENSE" and m_start.isoformat() <= t["date"] <= m_end.isoformat())
-        
-        month_names = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+    for m_start in months:
+        totals = monthly_totals.get(m_start.strftime("%Y-%m"), {})
         monthly_comparison.append({
-            "month": month_names[m - 1],
-            "year": y,
-            "income": round(m_income, 2),
-            "expense": round(m_expense, 2)
+            "month": month_names[m_start.month - 1],
+            "year": m_start.year,
+            "income": totals.get("income", 0),
+            "expense": totals.get("expense", 0)
         })
     
     # Recent transactions
-    recent = await db.transactions.find(
-        {"user_id": current_user["id"], "deleted_at": None},
-        {"_id": 0}
-    ).sort("date", -1).limit(5).to_list(5)
-    
-    recent_cat_ids = list(set(t["category_id"] for t in recent))
-    recent_categories = {}
-    if recent_cat_ids:
-        rcats = await db.categories.find({"id": {"$in": recent_cat_ids}}, {"_id": 0}).to_list(len(recent_cat_ids))
-        recent_categories = {c["id"]: c for c in rcats}
-    
     recent_transactions = []
-    for t in recent:
-        cat = recent_categories.get(t["category_id"], {})
-        date_val = t.get("date")
-        if isinstance(date_val, str):
-            date_val = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
-        created_at = t.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        updated_at = t.get("updated_at")
-        if isinstance(updated_at, str):
-            updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-        
-        recent_transactions.append(TransactionResponse(
-            id=t["id"],
-            user_id=t["user_id"],
-            type=t["type"],
-            description=t["description"],
-            amount=t["amount"],
-            date=date_val,
-            category_id=t["category_id"],
-            category_name=cat.get("name"),
-            category_color=cat.get("color"),
-            payment_method=t.get("payment_method"),
-            notes=t.get("notes"),
-            created_at=created_at,
-            updated_at=updated_at
-        ))
+    for t in dashboard["recent"]:
+        recent_transactions.append({
+            "id": t["id"],
+            "user_id": t["user_id"],
+            "type": t["type"],
+            "description": t["description"],
+            "amount": t["amount"],
+            "date": t["date"],
+            "category_id": t["category_id"],
+            "category_name": t.get("category_name"),
+            "category_color": t.get("category_color"),
+            "payment_method": t.get("payment_method"),
+            "notes": t.get("notes"),
+            "created_at": t["created_at"],
+            "updated_at": t.get("updated_at")
+        })
     
-    return DashboardResponse(
-        current_balance=round(current_balance, 2),
-        total_income=round(total_income, 2),
-        total_expense=round(total_expense, 2),
-        income_vs_expense_change=round(income_vs_expense_change, 2),
-        expenses_by_category=expenses_by_cat,
-        income_vs_expense_daily=income_vs_expense_daily,
-        monthly_comparison=monthly_comparison,
-        recent_transactions=recent_transactions
-    )
+    return AppJSONResponse({
+        "current_balance": from_cents(current_balance),
+        "total_income": from_cents(total_income),
+        "total_expense": from_cents(total_expense),
+        "income_vs_expense_change": round(income_vs_expense_change, 2),
+        "expenses_by_category": expenses_by_cat,
+        "income_vs_expense_daily": dashboard["daily"],
+        "monthly_comparison": monthly_comparison,
+        "recent_transactions": recent_transactions
+    })
 
 @reports_router.get("/export")
 async def export_csv(
@@ -1245,9 +1355,9 @@ async def export_csv(
     end_date: Optional[str] = None,
     type: Optional[Literal["INCOME", "EXPENSE"]] = None,
     category_id: Optional[str] = None,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    query = {"user_id": current_user["id"], "deleted_at": None}
+    query = {"user_id": user_id, "deleted_at": None}
     
     now = datetime.now(BRAZIL_TZ)
     if not start_date:
@@ -1255,7 +1365,7 @@ async def export_csv(
     if not end_date:
         end_date = now.strftime("%Y-%m-%d")
     
-    query["date"] = {"$gte": start_date, "$lte": end_date + "T23:59:59"}
+    query["date"] = {"$gte": parse_date_param(start_date), "$lte": parse_date_param(end_date, end_of_day=True)}
     
     if type:
         query["type"] = type
@@ -1263,37 +1373,35 @@ async def export_csv(
     if category_id:
         query["category_id"] = category_id
     
-    transactions = await db.transactions.find(query, {"_id": 0}).sort("date", -1).to_list(100000)
-    
-    # Get category names
-    cat_ids = list(set(t["category_id"] for t in transactions))
-    categories = {}
-    if cat_ids:
-        cats = await db.categories.find({"id": {"$in": cat_ids}}, {"_id": 0}).to_list(len(cat_ids))
-        categories = {c["id"]: c["name"] for c in cats}
+    # Category names are joined server-side so rows can be written as the cursor yields them
+    cursor = db.transactions.aggregate([
+        {"$match": query},
+        {"$sort": {"date": -1}},
+        *EXPORT_LOOKUP_STAGES,
+    ], batchSize=EXPORT_BATCH_SIZE)
     
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output, quoting=csv.QUOTE_ALL)
-    writer.writerow(["Data", "Tipo", "Descrição", "Categoria", "Valor", "Método de Pagamento", "Observações"])
-    
-    for t in transactions:
-        date_str = t["date"][:10] if isinstance(t["date"], str) else t["date"].strftime("%Y-%m-%d")
-        tipo = "Receita" if t["type"] == "INCOME" else "Despesa"
-        categoria = categories.get(t["category_id"], "Desconhecida")
-        valor = f"{t['amount']:.2f}".replace(".", ",")
-        metodo = t.get("payment_method") or ""
-        metodo_map = {"CASH": "Dinheiro", "DEBIT": "Débito", "CREDIT": "Crédito", "PIX": "PIX", "TRANSFER": "Transferência"}
-        metodo = metodo_map.get(metodo, metodo)
-        notas = t.get("notes") or ""
+    async def generate():
+        # writerow returns the formatted line, so nothing is buffered between rows
+        writer = csv.writer(_Echo(), quoting=csv.QUOTE_ALL)
         
-        writer.writerow([date_str, tipo, t["description"], categoria, valor, metodo, notas])
+        yield ("\ufeff" + writer.writerow(["Data", "Tipo", "Descrição", "Categoria", "Valor", "Método de Pagamento", "Observações"])).encode("utf-8")
+        
+        async for t in cursor:
+            date_str = local_date_str(t["date"])
+            tipo = TRANSACTION_TYPE_LABELS[t["type"]]
+            categoria = t.get("category_name") or "Desconhecida"
+            reais, cents = divmod(t["amount_cents"], 100)
+            valor = f"{reais},{cents:02d}"
+            metodo = t.get("payment_method") or ""
+            metodo = PAYMENT_METHOD_LABELS.get(metodo, metodo)
+            notas = t.get("notes") or ""
+            
+            yield writer.writerow([date_str, tipo, t["description"], categoria, valor, metodo, notas]).encode("utf-8")
     
-    output.seek(0)
     filename = f"transacoes_{start_date}_ate_{end_date}.csv"
     
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode("utf-8-sig")),
+        generate(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -1301,117 +1409,96 @@ async def export_csv(
 # ==================== GOALS ROUTES ====================
 
 @goals_router.get("", response_model=List[GoalResponse])
-async def list_goals(current_user: dict = Depends(get_current_user)):
-    goals = await db.goals.find({"user_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1).to_list(100)
+async def list_goals(user_id: str = Depends(get_current_user_id)):
+    goals = await db.goals.find({"user_id": user_id}, {"_id": 0}).sort("created_at", -1).to_list(100)
     
     result = []
     for g in goals:
-        created_at = g.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        deadline = g.get("deadline")
-        if isinstance(deadline, str):
-            deadline = datetime.fromisoformat(deadline.replace('Z', '+00:00'))
-        
         progress = (g["current_amount"] / g["target_amount"] * 100) if g["target_amount"] > 0 else 0
         
-        result.append(GoalResponse(
-            id=g["id"],
-            user_id=g["user_id"],
-            name=g["name"],
-            target_amount=g["target_amount"],
-            current_amount=g["current_amount"],
-            progress=round(min(progress, 100), 2),
-            deadline=deadline,
-            icon=g.get("icon"),
-            color=g["color"],
-            created_at=created_at
-        ))
+        result.append({
+            "id": g["id"],
+            "user_id": g["user_id"],
+            "name": g["name"],
+            "target_amount": g["target_amount"],
+            "current_amount": g["current_amount"],
+            "progress": round(min(progress, 100), 2),
+            "deadline": g.get("deadline"),
+            "icon": g.get("icon"),
+            "color": g["color"],
+            "created_at": g["created_at"]
+        })
     
-    return result
+    return AppJSONResponse(result)
 
 @goals_router.post("", response_model=GoalResponse, status_code=201)
 async def create_goal(
     goal: GoalCreate,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     now = datetime.now(timezone.utc)
     goal_doc = {
         "id": str(uuid.uuid4()),
-        "user_id": current_user["id"],
+        "user_id": user_id,
         "name": goal.name,
         "target_amount": round(goal.target_amount, 2),
         "current_amount": round(goal.current_amount, 2),
-        "deadline": goal.deadline.isoformat() if goal.deadline else None,
+        "deadline": to_aware(goal.deadline) if goal.deadline else None,
         "icon": goal.icon,
         "color": goal.color,
-        "created_at": now.isoformat()
+        "created_at": now
     }
     
     await db.goals.insert_one(goal_doc)
     
     progress = (goal_doc["current_amount"] / goal_doc["target_amount"] * 100) if goal_doc["target_amount"] > 0 else 0
     
-    return GoalResponse(
-        id=goal_doc["id"],
-        user_id=goal_doc["user_id"],
-        name=goal_doc["name"],
-        target_amount=goal_doc["target_amount"],
-        current_amount=goal_doc["current_amount"],
-        progress=round(min(progress, 100), 2),
-        deadline=goal.deadline,
-        icon=goal_doc["icon"],
-        color=goal_doc["color"],
-        created_at=now
-    )
+    return AppJSONResponse({
+        "id": goal_doc["id"],
+        "user_id": goal_doc["user_id"],
+        "name": goal_doc["name"],
+        "target_amount": goal_doc["target_amount"],
+        "current_amount": goal_doc["current_amount"],
+        "progress": round(min(progress, 100), 2),
+        "deadline": goal_doc["deadline"],
+        "icon": goal_doc["icon"],
+        "color": goal_doc["color"],
+        "created_at": now
+    }, status_code=201)
 
 @goals_router.get("/{goal_id}", response_model=GoalResponse)
 async def get_goal(
     goal_id: str,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     goal = await db.goals.find_one(
-        {"id": goal_id, "user_id": current_user["id"]},
+        {"id": goal_id, "user_id": user_id},
         {"_id": 0}
     )
     if not goal:
         raise HTTPException(status_code=404, detail="Meta não encontrada")
     
-    created_at = goal.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    deadline = goal.get("deadline")
-    if isinstance(deadline, str):
-        deadline = datetime.fromisoformat(deadline.replace('Z', '+00:00'))
-    
     progress = (goal["current_amount"] / goal["target_amount"] * 100) if goal["target_amount"] > 0 else 0
     
-    return GoalResponse(
-        id=goal["id"],
-        user_id=goal["user_id"],
-        name=goal["name"],
-        target_amount=goal["target_amount"],
-        current_amount=goal["current_amount"],
-        progress=round(min(progress, 100), 2),
-        deadline=deadline,
-        icon=goal.get("icon"),
-        color=goal["color"],
-        created_at=created_at
-    )
+    return AppJSONResponse({
+        "id": goal["id"],
+        "user_id": goal["user_id"],
+        "name": goal["name"],
+        "target_amount": goal["target_amount"],
+        "current_amount": goal["current_amount"],
+        "progress": round(min(progress, 100), 2),
+        "deadline": goal.get("deadline"),
+        "icon": goal.get("icon"),
+        "color": goal["color"],
+        "created_at": goal["created_at"]
+    })
 
 @goals_router.patch("/{goal_id}", response_model=GoalResponse)
 async def update_goal(
     goal_id: str,
     update: GoalUpdate,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
-    goal = await db.goals.find_one(
-        {"id": goal_id, "user_id": current_user["id"]},
-        {"_id": 0}
-    )
-    if not goal:
-        raise HTTPException(status_code=404, detail="Meta não encontrada")
-    
     update_data = update.model_dump(exclude_unset=True)
     
     if "target_amount" in update_data:
@@ -1419,42 +1506,43 @@ async def update_goal(
     if "current_amount" in update_data:
         update_data["current_amount"] = round(update_data["current_amount"], 2)
     if "deadline" in update_data and update_data["deadline"]:
-        update_data["deadline"] = update_data["deadline"].isoformat()
+        update_data["deadline"] = to_aware(update_data["deadline"])
     
+    owner_filter = {"id": goal_id, "user_id": user_id}
     if update_data:
-        await db.goals.update_one({"id": goal_id}, {"$set": update_data})
-    
-    updated = await db.goals.find_one({"id": goal_id}, {"_id": 0})
-    
-    created_at = updated.get("created_at")
-    if isinstance(created_at, str):
-        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-    deadline = updated.get("deadline")
-    if isinstance(deadline, str):
-        deadline = datetime.fromisoformat(deadline.replace('Z', '+00:00'))
+        updated = await db.goals.find_one_and_update(
+            owner_filter,
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        updated = await db.goals.find_one(owner_filter, {"_id": 0})
+    if not updated:
+        raise HTTPException(status_code=404, detail="Meta não encontrada")
     
     progress = (updated["current_amount"] / updated["target_amount"] * 100) if updated["target_amount"] > 0 else 0
     
-    return GoalResponse(
-        id=updated["id"],
-        user_id=updated["user_id"],
-        name=updated["name"],
-        target_amount=updated["target_amount"],
-        current_amount=updated["current_amount"],
-        progress=round(min(progress, 100), 2),
-        deadline=deadline,
-        icon=updated.get("icon"),
-        color=updated["color"],
-        created_at=created_at
-    )
+    return AppJSONResponse({
+        "id": updated["id"],
+        "user_id": updated["user_id"],
+        "name": updated["name"],
+        "target_amount": updated["target_amount"],
+        "current_amount": updated["current_amount"],
+        "progress": round(min(progress, 100), 2),
+        "deadline": updated.get("deadline"),
+        "icon": updated.get("icon"),
+        "color": updated["color"],
+        "created_at": updated["created_at"]
+    })
 
 @goals_router.delete("/{goal_id}")
 async def delete_goal(
     goal_id: str,
-    current_user: dict = Depends(get_current_user)
+    user_id: str = Depends(get_current_user_id)
 ):
     goal = await db.goals.find_one(
-        {"id": goal_id, "user_id": current_user["id"]},
+        {"id": goal_id, "user_id": user_id},
         {"_id": 0}
     )
     if not goal:
@@ -1488,23 +1576,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Trailing "Z" or "+HH:MM"/"-HHMM" offset of an ISO 8601 timestamp
+ISO_OFFSET_SUFFIX = r"(Z|[+-]\d{2}:?\d{2})$"
+
+async def convert_iso_dates(migration_id: str, fields_by_collection: dict):
+    """One-time conversion of ISO string timestamps into native BSON dates."""
+    if await db.migrations.find_one({"id": migration_id}):
+        return
+    for collection, fields in fields_by_collection.items():
+        for field in fields:
+            # Strings carrying an offset convert as-is; $dateFromString rejects a timezone for them
+            with_offset = await db[collection].update_many(
+                {field: {"$type": "string", "$regex": ISO_OFFSET_SUFFIX}},
+                [{"$set": {field: {"$toDate": f"${field}"}}}]
+            )
+            # What's left is naive, read as app-local time like to_aware() does
+            naive = await db[collection].update_many(
+                {field: {"$type": "string"}},
+                [{"$set": {field: {"$dateFromString": {"dateString": f"${field}", "timezone": BRAZIL_TZ.key}}}}]
+            )
+            converted = with_offset.modified_count + naive.modified_count
+            if converted:
+                logger.info(f"Converted {converted} {collection}.{field} values to BSON dates")
+    await db.migrations.insert_one({"id": migration_id, "applied_at": datetime.now(timezone.utc)})
+
+async def convert_amounts_to_cents(migration_id: str):
+    """One-time conversion of float transaction amounts into integer cents."""
+    if await db.migrations.find_one({"id": migration_id}):
+        return
+    result = await db.transactions.update_many(
+        {"amount": {"$exists": True}},
+        [
+            {"$set": {"amount_cents": {"$toLong": {"$round": [{"$multiply": ["$amount", 100]}, 0]}}}},
+            {"$unset": "amount"}
+        ]
+    )
+    if result.modified_count:
+        logger.info(f"Converted {result.modified_count} transaction amounts to cents")
+    await db.migrations.insert_one({"id": migration_id, "applied_at": datetime.now(timezone.utc)})
+
+# Baseline indexes superseded by the compound/collated ones built at startup
+REPLACED_INDEXES = {
+    "transactions": ["user_id_1_date_-1", "user_id_1_category_id_1", "user_id_1_type_1"],
+    "categories": ["user_id_1_name_1"],
+}
+
+async def drop_replaced_indexes(migration_id: str, names_by_collection: dict):
+    """One-time removal of indexes that newer ones make redundant."""
+    if await db.migrations.find_one({"id": migration_id}):
+        return
+    for collection, names in names_by_collection.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info(f"Dropped redundant index {collection}.{name}")
+    await db.migrations.insert_one({"id": migration_id, "applied_at": datetime.now(timezone.utc)})
+
+async def purge_plaintext_refresh_tokens(migration_id: str):
+    """One-time removal of pre-hash refresh tokens and their plaintext index."""
+    if await db.migrations.find_one({"id": migration_id}):
+        return
+    # These rows have no token_hash and would collide as nulls in the unique index
+    result = await db.refresh_tokens.delete_many({"token_hash": {"$exists": False}})
+    if result.deleted_count:
+        logger.info(f"Deleted {result.deleted_count} plaintext refresh tokens")
+    if "token_1" in await db.refresh_tokens.index_information():
+        await db.refresh_tokens.drop_index("token_1")
+    await db.migrations.insert_one({"id": migration_id, "applied_at": datetime.now(timezone.utc)})
+
 @app.on_event("startup")
 async def startup_db_client():
+    await convert_iso_dates("iso_dates_to_bson", ISO_DATE_FIELDS)
+    await convert_iso_dates("goal_iso_dates_to_bson", GOAL_ISO_DATE_FIELDS)
+    await convert_amounts_to_cents("transaction_amount_cents")
+    await drop_replaced_indexes("drop_baseline_indexes", REPLACED_INDEXES)
+    await purge_plaintext_refresh_tokens("refresh_token_hashes")
+    
     # Create indexes
     await db.users.create_index("email", unique=True)
     await db.users.create_index("id", unique=True)
-    await db.categories.create_index([("user_id", 1), ("name", 1)])
+    await db.categories.create_index(
+        [("user_id", 1), ("name", 1)],
+        collation=CATEGORY_NAME_COLLATION,
+        name="user_id_name_ci"
+    )
     await db.categories.create_index("id", unique=True)
-    await db.transactions.create_index([("user_id", 1), ("date", -1)])
-    await db.transactions.create_index([("user_id", 1), ("category_id", 1)])
-    await db.transactions.create_index([("user_id", 1), ("type", 1)])
+    # Equality, Sort, Range: filters on user/deleted_at/type/category, sorted and ranged on date
+    await db.transactions.create_index([("user_id", 1), ("deleted_at", 1), ("date", -1)])
+    await db.transactions.create_index([("user_id", 1), ("category_id", 1), ("date", -1)])
+    await db.transactions.create_index([("user_id", 1), ("type", 1), ("date", -1)])
+    # Report scans only ever touch live rows; keep soft-deleted ones out of the index
+    await db.transactions.create_index(
+        [("user_id", 1), ("date", -1), ("type", 1), ("category_id", 1)],
+        partialFilterExpression={"deleted_at": None},
+        name="reports_covering"
+    )
     await db.transactions.create_index("id", unique=True)
     await db.goals.create_index([("user_id", 1)])
     await db.goals.create_index("id", unique=True)
-    await db.refresh_tokens.create_index("token")
+    await db.refresh_tokens.create_index("token_hash", unique=True)
     await db.refresh_tokens.create_index([("user_id", 1)])
+    await db.refresh_tokens.create_index("expires_at", expireAfterSeconds=0)
     logger.info("Database indexes created")
+    
+    app.state.login_sweeper = asyncio.create_task(sweep_login_attempts())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.login_sweeper.cancel()
     client.close()